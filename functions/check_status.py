@@ -1,18 +1,50 @@
 import asyncio
+import logging
 import random
+import time
 from bs4 import BeautifulSoup
-from playwright.async_api import async_playwright  # Playwright async API
 from functions.status import still_auctioning, cancelled_auction, auction_referred, auction_sold
+from functions.lot_ids import lot_id
 
-async def extract_url_status(url, browser, max_retries=3):
+logger = logging.getLogger(__name__)
+
+def classify_soup(soup):
+    """
+    Determine the auction status of an already-parsed lot page.
+    Returns (status_code, price) where status_code is 'running', 'cancelled', 'referred', 'sold'
+    or 'unknown', and price is the sold price for 'sold' (None otherwise).
+    """
+    if still_auctioning(soup):
+        # Auction is still ongoing
+        return 'running', None
+    if cancelled_auction(soup):
+        # Auction was cancelled
+        return 'cancelled', None
+    if auction_referred(soup):
+        # Auction ended as referred (no sale)
+        return 'referred', None
+    sold_flag, sold_price = auction_sold(soup)
+    if sold_flag:
+        # Auction ended as sold
+        return 'sold', sold_price
+    return 'unknown', None
+
+async def extract_url_status(url, browser, max_retries=1, attempt=1):
     """
     Use Playwright to retrieve the page at `url` and determine the auction status.
-    Returns a tuple (status_code, soup, price, url) where:
+    Returns a tuple (status_code, soup, price, url, duration) where:
       - status_code is one of 'running', 'cancelled', 'referred', 'sold', 'unknown', or 'error'
-      - soup is the BeautifulSoup object of the page (for 'referred'/'sold' statuses where details are needed; None otherwise)
+      - soup is the BeautifulSoup object of the page (for 'referred'/'sold' statuses where details are needed,
+        and for 'unknown' so the page can be dead-lettered; None otherwise)
       - price is the sold price (float, for 'sold' status only; None otherwise)
       - url is the page URL (echoed back for reference)
-    Retries the request up to `max_retries` times using random user agents and delays for stealth.
+      - duration is the seconds from page.goto to classification for the last try (the stealth
+        delay before it is not counted), or None if nothing was tried
+    Makes up to `max_retries` attempts using random user agents and delays for stealth. The default is a
+    single attempt: lots that stay 'unknown'/'error' are re-tried in later runs via the retry queue
+    (functions/retry_queue.py) instead of holding a slot here.
+    `attempt` is the lot's attempt number from the retry queue, used in the log records; extra tries
+    made here count up from it.
     """
     # List of user-agent strings to mimic different browsers
     user_agents = [
@@ -22,13 +54,16 @@ async def extract_url_status(url, browser, max_retries=3):
         "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_4) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.4 Safari/605.1.15",
         "Mozilla/5.0 (Macintosh; Intel Mac OS X 14.4; rv:124.0) Gecko/20100101 Firefox/124.0"
     ]
-    for attempt in range(max_retries):
+    last_soup = None
+    duration = None
+    for i in range(max_retries):
         # Randomize User-Agent and delay each attempt
         user_agent = random.choice(user_agents)
         await asyncio.sleep(random.uniform(5, 8))
         # Create a fresh browser context with the random user agent
         context = await browser.new_context(user_agent=user_agent)
         page = await context.new_page()
+        start = time.perf_counter()
         try:
             # Navigate to the URL with a timeout (60 seconds)
             await page.goto(url, timeout=60000)
@@ -38,29 +73,33 @@ async def extract_url_status(url, browser, max_retries=3):
             content = await page.content()
             soup = BeautifulSoup(content, 'html.parser')
             # Check for each known status condition
-            if still_auctioning(soup):
-                # Auction is still ongoing
-                return ('running', None, None, url)
-            if cancelled_auction(soup):
-                # Auction was cancelled
-                return ('cancelled', None, None, url)
-            if auction_referred(soup):
-                # Auction ended as referred (no sale)
-                return ('referred', soup, None, url)
-            sold_flag, sold_price = auction_sold(soup)
-            if sold_flag:
-                # Auction ended as sold
-                return ('sold', soup, sold_price, url)
+            status_code, price = classify_soup(soup)
+            duration = time.perf_counter() - start
+            if status_code in ('running', 'cancelled'):
+                return (status_code, None, None, url, duration)
+            if status_code in ('referred', 'sold'):
+                return (status_code, soup, price, url, duration)
             # If none of the conditions matched:
-            print(f"Unknown status for URL: {url} (Attempt {attempt+1})")
+            last_soup = soup
+            logger.warning(f"Unknown status for URL: {url} (Attempt {attempt + i})", extra={
+                'lot_id': lot_id(url), 'url': url, 'status': 'unknown',
+                'attempt': attempt + i, 'duration': duration})
             # Continue to next attempt (after closing context in finally)
         except Exception as e:
             # Handle network errors, timeouts, etc.
-            print(f"Request failed on attempt {attempt+1} for {url}: {e}")
+            duration = time.perf_counter() - start
+            logger.warning(f"Request failed on attempt {attempt + i} for {url}: {e}", extra={
+                'lot_id': lot_id(url), 'url': url, 'status': 'error',
+                'attempt': attempt + i, 'duration': duration})
             # (Will retry if attempts remain)
         finally:
             # Close the context (and page) to clean up resources
             await context.close()
     # If all attempts exhausted without a definitive status:
-    print(f"Failed to retrieve page after {max_retries} attempts: {url}")
-    return ('error', None, None, url)
+    if last_soup is not None:
+        # The page loaded but matched no known status (already logged above)
+        return ('unknown', last_soup, None, url, duration)
+    logger.warning(f"Failed to retrieve page after {max_retries} attempts: {url}", extra={
+        'lot_id': lot_id(url), 'url': url, 'status': 'error',
+        'attempt': attempt + max_retries - 1, 'duration': duration})
+    return ('error', None, None, url, duration)
@@ -7,14 +7,26 @@ Changes (fixes):
 - Accepts BOTH URL patterns:
     motor-vehicles-motor-cycles
     motor-vehiclesmotor-cycles
-- Keeps the same href format as before (relative /lot/... links)
+- Dedupes on the canonical lot ID (e.g. 0001-21060987), so the two slug
+  variants of the same lot are only stored once, and lots already in
+  scraped_links.csv or dead_letter.json are not collected again
+- Conditional refresh: pages that are unchanged since the last crawl (304, or
+  same ordered lot IDs in the raw HTML) are not re-rendered, and only lot IDs
+  new to a page are processed (see functions/page_cache.py)
 """
 
 import asyncio
+import logging
 import random
-import pandas as pd
-import os
-from playwright.async_api import async_playwright
+from functions.csv_store import read_link_column, write_car_links
+from functions.lot_ids import LotIdSet, LotLinks, is_vehicle_lot_link, lot_id
+from functions.page_cache import (
+    SearchPageCache, check_page, NOT_MODIFIED, UNCHANGED, VERIFY, RENDER,
+    SOURCE_RAW, SOURCE_RENDER,
+)
+from functions.retry_queue import RetryQueue
+
+logger = logging.getLogger(__name__)
 
 # Base URL and auction page template
 BASE_URL = "https://www.grays.com"
@@ -25,6 +37,7 @@ AUCTION_URL_TEMPLATE = (
 
 # Path for storing links CSV
 CSV_FILE = "CSV_data/car_links.csv"
+SCRAPED_CSV_FILE = "CSV_data/scraped_links.csv"
 
 # Realistic desktop User-Agents (removed iPhone UA to avoid mobile markup mismatch)
 USER_AGENTS = [
@@ -37,99 +50,185 @@ USER_AGENTS = [
 # If you want a safety cap (optional)
 MAX_PAGES = 200
 
-def is_vehicle_lot_link(href: str) -> bool:
-    """True if href looks like a vehicle lot link we care about."""
-    if not href or "/lot/" not in href:
-        return False
+# Seconds to wait between search pages
+PAGE_DELAY = (3, 6)
 
-    # Accept both patterns (Grays has used both)
-    return ("motor-vehicles-motor-cycles" in href) or ("motor-vehiclesmotor-cycles" in href)
 
-async def collect_car_links():
-    """Collects car auction links and updates the CSV."""
-    try:
-        existing_links = set(pd.read_csv(CSV_FILE)["Car Links"].dropna().astype(str).tolist())
-        print(f"Loaded {len(existing_links)} existing links from CSV.")
-    except FileNotFoundError:
-        existing_links = set()
-        print("No existing CSV found. Starting fresh.")
+class PlaywrightSearchPages:
+    """
+    Fetches and renders search pages with Playwright, each request in a fresh
+    browser context with a random User-Agent.
 
-    new_links = set()
-    page_number = 1
+    collect_car_links only needs an async context manager with:
+      - fetch(url, headers) -> (status, response_headers, body_bytes)   cheap conditional GET
+      - render(url) -> list of lot hrefs on the fully rendered page
+    so a stub with the same methods can stand in for it in tests.
+    """
 
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
+    async def __aenter__(self):
+        from playwright.async_api import async_playwright
 
-        while page_number <= MAX_PAGES:
-            auction_url = AUCTION_URL_TEMPLATE.format(page_number)
-            print(f"Scraping page {page_number}...")
+        self._playwright = await async_playwright().start()
+        self._browser = await self._playwright.chromium.launch(headless=True)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._browser.close()
+        await self._playwright.stop()
 
-            context = None
+    async def _new_context(self):
+        return await self._browser.new_context(user_agent=random.choice(USER_AGENTS))
+
+    async def fetch(self, url, headers):
+        context = await self._new_context()
+        try:
+            response = await context.request.get(url, headers=headers, timeout=30_000)
+            return response.status, response.headers, await response.body()
+        finally:
+            await context.close()
+
+    async def render(self, url):
+        context = await self._new_context()
+        try:
+            page = await context.new_page()
+
+            # Load page
+            await page.goto(url, wait_until="domcontentloaded", timeout=60_000)
+
+            # Let JS finish (don’t fail if it never reaches networkidle)
             try:
-                user_agent = random.choice(USER_AGENTS)
-                context = await browser.new_context(user_agent=user_agent)
-                page = await context.new_page()
+                await page.wait_for_load_state("networkidle", timeout=15_000)
+            except Exception:
+                pass
 
-                # Load page
-                await page.goto(auction_url, wait_until="domcontentloaded", timeout=60_000)
+            # Small jitter so it behaves like your old “working” version
+            await asyncio.sleep(random.uniform(1.5, 3.0))
 
-                # Let JS finish (don’t fail if it never reaches networkidle)
+            # Collect lot links
+            hrefs = []
+            for element in await page.query_selector_all("a[href*='/lot/']"):
                 try:
-                    await page.wait_for_load_state("networkidle", timeout=15_000)
-                except Exception:
-                    pass
-
-                # Small jitter so it behaves like your old “working” version
-                await asyncio.sleep(random.uniform(1.5, 3.0))
-
-                # Collect lot links
-                car_elements = await page.query_selector_all("a[href*='/lot/']")
-
-                # If there are genuinely no lot links, stop cleanly
-                if not car_elements:
-                    print(f"No more links found. Stopping at page {page_number}.")
-                    break
-
-                for element in car_elements:
-                    try:
-                        href = await element.get_attribute("href")
-                        if href and is_vehicle_lot_link(href):
-                            if href not in existing_links and href not in new_links:
-                                new_links.add(href)
-                    except (TypeError, AttributeError) as err:
-                        print(f"Error getting link: {err}")
+                    hrefs.append(await element.get_attribute("href"))
+                except (TypeError, AttributeError) as err:
+                    logger.error(f"Error getting link: {err}")
+            return hrefs
+        finally:
+            await context.close()
+
+
+def _page_ids(hrefs):
+    """Ordered, de-duplicated lot IDs of a page's hrefs."""
+    return list(dict.fromkeys(lot_id(href) for href in hrefs))
+
+
+async def collect_car_links(pages=None, page_delay=PAGE_DELAY):
+    """
+    Collects car auction links and updates the CSV.
+    `pages` fetches/renders search pages (PlaywrightSearchPages by default).
+    Returns the search page stats for the run.
+    """
+    existing_links = LotLinks(read_link_column(CSV_FILE, "Car Links"))
+    if existing_links:
+        logger.info(f"Loaded {len(existing_links)} existing links from CSV.")
+    else:
+        logger.info("No existing CSV found. Starting fresh.")
+
+    # Lots we have already finished with, keyed by lot ID only
+    scraped_ids = LotIdSet(read_link_column(SCRAPED_CSV_FILE, "Referred_URL", "Sold_URL"))
+    logger.info(f"Loaded {len(scraped_ids)} already scraped lot IDs.")
+
+    # Dead-lettered lots are only picked up again through `main.py replay --requeue`
+    dead_letters = RetryQueue().dead_letters
+    for key in dead_letters:
+        scraped_ids.add(key)
+    if dead_letters:
+        logger.info(f"Skipping {len(dead_letters)} dead-lettered lot IDs.")
+
+    new_links = LotLinks()
+    page_cache = SearchPageCache()
+    page_number = 1
+
+    async with (pages or PlaywrightSearchPages()) as pages:
+        while page_number <= MAX_PAGES:
+            auction_url = AUCTION_URL_TEMPLATE.format(page_number)
+            logger.info(f"Scraping page {page_number}...")
+
+            try:
+                # Cheap conditional GET first; only render the page if we have to
+                outcome, hrefs, headers, nbytes = await check_page(
+                    pages.fetch, auction_url, page_number, page_cache
+                )
+
+                # Rendered pages are cached without validators (see functions/page_cache.py)
+                source = SOURCE_RAW
+                if outcome == NOT_MODIFIED:
+                    logger.info(f"Page {page_number} not modified since last crawl, skipping.")
+                    if not page_cache.lot_ids(page_number):
+                        logger.info(f"No more links found. Stopping at page {page_number}.")
+                        break
+                elif outcome == UNCHANGED:
+                    logger.info(f"Page {page_number} has the same lots as last crawl, skipping render.")
+                elif outcome in (VERIFY, RENDER):
+                    page_cache.stats["pages_rendered"] += 1
+                    rendered = await pages.render(auction_url)
+
+                    # If there are genuinely no lot links, stop cleanly
+                    if not rendered:
+                        logger.info(f"No more links found. Stopping at page {page_number}.")
+                        break
+
+                    # Skip hrefs we can't parse a lot ID from, so they never reach the cache
+                    rendered = [href for href in rendered if href and is_vehicle_lot_link(href) and lot_id(href)]
+
+                    # The raw HTML is only trusted next time if it listed exactly what the render did
+                    if outcome == RENDER or _page_ids(rendered) != _page_ids(hrefs):
+                        source = SOURCE_RENDER
+                    hrefs = rendered
+
+                if outcome != NOT_MODIFIED:
+                    page_ids = _page_ids(hrefs)
+
+                    # Only lots that were not on this page last time need looking at
+                    new_ids = set(page_cache.new_lot_ids(page_number, page_ids))
+                    for href in hrefs:
+                        if lot_id(href) in new_ids and href not in existing_links and href not in scraped_ids:
+                            if new_links.add(href):
+                                page_cache.stats["new_lots"] += 1
+
+                    page_cache.update(page_number, page_ids, headers, nbytes, source=source)
 
             except Exception as err:
-                print(f"Error loading page {page_number}: {err}")
+                logger.error(f"Error loading page {page_number}: {err}")
                 break
-            finally:
-                if context:
-                    await context.close()
 
-            delay = random.uniform(3, 6)
-            print(f"Waiting {delay:.2f} seconds before next page...")
+            delay = random.uniform(*page_delay)
+            logger.info(f"Waiting {delay:.2f} seconds before next page...")
             await asyncio.sleep(delay)
 
             page_number += 1
 
-        await browser.close()
-
-    print(f"Found {len(new_links)} new car links.")
+    logger.info(f"Found {len(new_links)} new car links.")
 
     # Update the CSV file with new links only
     if new_links:
-        all_links = existing_links.union(new_links)
-
-        # Keep only relevant vehicle lot links (both patterns)
-        all_links = {link for link in all_links if is_vehicle_lot_link(link)}
+        # Keep only relevant vehicle lot links (both patterns), one URL per lot ID
+        all_links = [link for link in existing_links.urls() + new_links.urls() if is_vehicle_lot_link(link)]
 
-        links_df = pd.DataFrame(sorted(all_links), columns=["Car Links"])
-        os.makedirs(os.path.dirname(CSV_FILE), exist_ok=True)
-        links_df.to_csv(CSV_FILE, index=False)
-        print(f"CSV updated with {len(all_links)} total links.")
+        write_car_links(CSV_FILE, sorted(all_links))
+        logger.info(f"CSV updated with {len(all_links)} total links.")
     else:
-        print("No new links to add to the CSV.")
+        logger.info("No new links to add to the CSV.")
+
+    page_cache.save()
+    page_cache.log_stats()
+    return page_cache.stats
 
 
 if __name__ == "__main__":
-    asyncio.run(collect_car_links())
+    from functions.logging_setup import setup_logging
+
+    listener = setup_logging()
+    try:
+        asyncio.run(collect_car_links())
+    finally:
+        listener.stop()
@@ -0,0 +1,22 @@
+"""Small helpers for the link CSVs (car_links.csv, scraped_links.csv), kept free of heavy imports."""
+
+import csv
+import os
+
+
+def read_link_column(path, *columns):
+    """Non-empty values of `columns` from a links CSV. Returns [] if the file is missing."""
+    try:
+        with open(path, newline="", encoding="utf-8") as f:
+            return [row[col] for row in csv.DictReader(f) for col in columns if row.get(col)]
+    except FileNotFoundError:
+        return []
+
+
+def write_car_links(path, urls):
+    """Write `urls` to the car links CSV (single 'Car Links' column)."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, lineterminator=os.linesep)
+        writer.writerow(["Car Links"])
+        writer.writerows([url] for url in urls)
@@ -1,4 +1,7 @@
 import re
+import logging
+
+logger = logging.getLogger(__name__)
 
 def extract_vehicle_details(soup, details=None):
     """
@@ -32,7 +35,7 @@ def extract_vehicle_details(soup, details=None):
                     details['model'] = title_parts[1] if len(title_parts) > 1 else ''
                     details['variant'] = ' '.join(title_parts[2:]) if len(title_parts) > 2 else ''
             except Exception as e:
-                print(f"Error extracting title details: {e}")
+                logger.error(f"Error extracting title details: {e}")
                 return None
             # Extract all key: value items from the description list
             for item in description_div.find_all('li'):
@@ -46,7 +49,7 @@ def extract_vehicle_details(soup, details=None):
                         else:
                             details[key] = value
                 except Exception as e:
-                    print(f"Error processing item '{item.text}': {e}")
+                    logger.error(f"Error processing item '{item.text}': {e}")
 
             bid_amount = soup.find('div', class_='dls-text-medium position-relative').find('a').text.split(' ')[0]
             try:
@@ -56,7 +59,7 @@ def extract_vehicle_details(soup, details=None):
                     details['bids'] = None  # If conversion fails, set to None
             except ValueError:
                 details['bids'] = None  # If conversion fails, set to None
-                print("Invalid input: 'd' cannot be converted to an integer.")
+                logger.warning("Invalid input: 'd' cannot be converted to an integer.")
 
             # Normalize specific fields
             try:
@@ -67,7 +70,7 @@ def extract_vehicle_details(soup, details=None):
                     match = re.search(pattern, text)
                     details['Registration Expiry Date'] = match.group(0) if match else '?'
             except Exception as e:
-                print(f"Error parsing Registration Expiry Date: {e}")
+                logger.error(f"Error parsing Registration Expiry Date: {e}")
             try:
                 # Find the <tr> that contains 'Location'
                 location_text = soup.find('td', string=re.compile('Location', re.IGNORECASE)).next_sibling.next_sibling.text.strip()
@@ -81,7 +84,7 @@ def extract_vehicle_details(soup, details=None):
                 else:
                     details['Location'] = '?'
             except Exception as e:
-                print(f"Error extracting Location: {e}")
+                logger.error(f"Error extracting Location: {e}")
                 details['Location'] = '?'
                 
             # Remove unwanted keys
@@ -89,7 +92,7 @@ def extract_vehicle_details(soup, details=None):
                 try:
                     details.pop('Key No', None)
                 except Exception as e:
-                    print(f"Error removing 'Key No': {e}")
+                    logger.error(f"Error removing 'Key No': {e}")
             # Auction end date
             try:
                 if date_tag and date_tag.has_attr('title'):
@@ -98,12 +101,12 @@ def extract_vehicle_details(soup, details=None):
                 else:
                     details['date'] = None
             except Exception as e:
-                print(f"Error extracting date: {e}")
+                logger.error(f"Error extracting date: {e}")
             return details
         else:
             # Essential elements not found
-            print("Main title or description section not found in page.")
+            logger.warning("Main title or description section not found in page.")
             return None
     except Exception as e:
-        print(f"Unexpected error in extract_vehicle_details: {e}")
+        logger.error(f"Unexpected error in extract_vehicle_details: {e}")
         return None
@@ -0,0 +1,93 @@
+"""
+Import-time check for the CLI.
+
+Runs `python -X importtime` on `import main` and on the light subcommands and
+reports the cumulative import time, the wall-clock start-up time, and any heavy
+dependency that got pulled in. Exits non-zero if a heavy module is imported or
+a light command spends more than IMPORT_BUDGET_MS importing. Wall-clock time is
+only printed: it includes interpreter start-up and is too noisy to gate on.
+
+tests/test_import_time.py runs the same checks as part of the test suite;
+this script just prints the numbers:
+
+    python -m functions.import_bench
+"""
+
+import os
+import re
+import subprocess
+import sys
+import time
+
+# Modules that only the run/collect/check/export/replay commands should load
+HEAVY_MODULES = ("pandas", "playwright", "bs4", "colorlog", "tqdm", "numpy", "asyncio")
+
+# Cumulative -X importtime budget for a light command (stdlib + our light modules)
+IMPORT_BUDGET_MS = 250
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$")
+
+MAIN_PY = os.path.join(REPO_ROOT, "main.py")
+
+CASES = [
+    ("import main", ["-c", "import main"]),
+    ("main.py --help", [MAIN_PY, "--help"]),
+    ("main.py stats", [MAIN_PY, "stats"]),
+]
+
+
+def run_case(args, cwd=REPO_ROOT):
+    """
+    Run python -X importtime with `args` in `cwd` (main.py reads CSV_data/ from there);
+    return (wall_s, cumulative_us_by_top_module, modules).
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [REPO_ROOT, os.environ.get("PYTHONPATH")])))
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        cwd=cwd, env=env, capture_output=True, text=True,
+    )
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(f"{' '.join(args)} failed:\n{proc.stderr}")
+
+    top_level, modules = {}, set()
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if not match:
+            continue
+        _, cumulative, indent, name = match.groups()
+        modules.add(name)
+        if len(indent) == 1:
+            top_level[name] = int(cumulative)
+    return wall, top_level, modules
+
+
+def total_import_ms(top_level):
+    """Cumulative import time of the top-level imports, in ms."""
+    return sum(top_level.values()) / 1000
+
+
+def main():
+    failed = False
+    for label, args in CASES:
+        wall, top_level, modules = run_case(args)
+        import_ms = total_import_ms(top_level)
+        heavy = sorted({m.split(".")[0] for m in modules} & set(HEAVY_MODULES))
+        slowest = sorted(top_level.items(), key=lambda kv: kv[1], reverse=True)[:3]
+
+        print(f"{label}")
+        print(f"  wall time   : {wall:.3f} s")
+        print(f"  import time : {import_ms:.1f} ms")
+        print(f"  slowest     : {', '.join(f'{n} {us / 1000:.1f} ms' for n, us in slowest)}")
+        if heavy:
+            print(f"  HEAVY       : {', '.join(heavy)}")
+        if heavy or import_ms > IMPORT_BUDGET_MS:
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
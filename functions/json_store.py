@@ -0,0 +1,29 @@
+"""Small helpers for the JSON state files kept next to the CSVs (retry queue, page cache, ...)."""
+
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+def load_json(path):
+    """Load a JSON dict from `path`, returning {} if the file is missing or unreadable."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not read {path}, starting empty: {e}")
+        return {}
+
+
+def save_json(path, data):
+    """Write `data` to `path` atomically (temp file + rename)."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
@@ -0,0 +1,194 @@
+"""
+Non-blocking logging for the scraper.
+
+Everything runs on the asyncio loop that drives Playwright, so log calls must
+not do file or console I/O inline. setup_logging() installs a single
+QueueHandler on the root logger; a QueueListener thread does the formatting and
+writes to:
+  - the console, coloured by the record's `status` field
+  - logs/scraping.log as JSON lines, rotated by size
+
+Per-lot context is passed through `extra`, e.g.
+    logger.info("Auction sold", extra={"lot_id": "0001-21060987", "status": "sold", "duration": 4.2})
+and ends up as fields of the JSON record.
+
+Run this module directly to measure event-loop stalls caused by logging with a
+plain FileHandler vs the queue handler at high concurrency.
+"""
+
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+from datetime import datetime
+
+LOG_DIR = "logs"
+LOG_FILE = os.path.join(LOG_DIR, "scraping.log")
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
+
+# Structured fields copied from `extra` into the JSON record
+STRUCTURED_FIELDS = ("lot_id", "url", "status", "attempt", "duration")
+
+# Console colour for INFO records, by lot status
+STATUS_COLORS = {
+    "referred": "cyan",
+    "sold": "green",
+    "cancelled": "red",
+    "running": "purple",
+}
+
+LEVEL_COLORS = {
+    "DEBUG": "cyan",
+    "INFO": "white",
+    "WARNING": "yellow",
+    "ERROR": "red",
+    "CRITICAL": "bold_red",
+}
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Format a record as one JSON object per line."""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for field in STRUCTURED_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = round(value, 3) if field == "duration" else value
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        elif record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class StructuredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that keeps the traceback as its own field.
+
+    The stock prepare() formats the whole record into `msg`, so a traceback ends
+    up glued into the message. Here only the message args are merged; the
+    traceback is rendered into `exc_text` (traceback objects can't be kept
+    across threads safely) and the formatters decide where it goes.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+
+def _console_formatter():
+    from colorlog import ColoredFormatter
+
+    class StatusColorFormatter(ColoredFormatter):
+        """Colour INFO lines by the record's `status` field instead of scanning the message."""
+
+        def format(self, record):
+            self.log_colors["INFO"] = STATUS_COLORS.get(getattr(record, "status", None), "white")
+            return super().format(record)
+
+    return StatusColorFormatter(
+        "%(log_color)s%(asctime)s [%(levelname)s] %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+        log_colors=dict(LEVEL_COLORS),
+    )
+
+
+def setup_logging(level=logging.INFO, log_file=LOG_FILE, console=True):
+    """
+    Route root logging through a queue to a background listener thread.
+    Returns the started QueueListener; call .stop() on it at exit to flush.
+    """
+    os.makedirs(os.path.dirname(log_file) or ".", exist_ok=True)
+
+    handlers = []
+    if console:
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(_console_formatter())
+        handlers.append(console_handler)
+
+    file_handler = logging.handlers.RotatingFileHandler(
+        log_file, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8"
+    )
+    file_handler.setFormatter(JsonLinesFormatter())
+    handlers.append(file_handler)
+
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+
+    logger = logging.getLogger()
+    logger.handlers = [StructuredQueueHandler(log_queue)]
+    logger.setLevel(level)
+
+    listener.start()
+    return listener
+
+
+async def _measure_loop_stall(n_tasks, lines_per_task):
+    """
+    Log from many concurrent tasks and return (total, p99, worst) time in ms that
+    the event loop spent blocked inside logging calls.
+    """
+    import asyncio
+    import time
+
+    blocked = []
+
+    async def worker(i):
+        log = logging.getLogger("bench")
+        for attempt in range(lines_per_task):
+            start = time.perf_counter()
+            log.info("Auction sold", extra={"lot_id": f"{i:04d}-21060987", "status": "sold",
+                                            "attempt": attempt, "duration": 1.0})
+            blocked.append(time.perf_counter() - start)
+            await asyncio.sleep(0)
+
+    await asyncio.gather(*(worker(i) for i in range(n_tasks)))
+    blocked.sort()
+    p99 = blocked[int(len(blocked) * 0.99)]
+    return sum(blocked) * 1000, p99 * 1000, blocked[-1] * 1000
+
+
+if __name__ == "__main__":
+    import asyncio
+    import tempfile
+
+    n_tasks, lines_per_task = 200, 50
+    with tempfile.TemporaryDirectory() as tmp:
+        root = logging.getLogger()
+
+        # Baseline: synchronous file + console handlers on the event loop
+        sync_file = logging.FileHandler(os.path.join(tmp, "sync.log"))
+        sync_file.setFormatter(JsonLinesFormatter())
+        sync_console = logging.StreamHandler(open(os.devnull, "w"))
+        sync_console.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] %(message)s"))
+        root.handlers = [sync_file, sync_console]
+        root.setLevel(logging.INFO)
+        sync_stats = asyncio.run(_measure_loop_stall(n_tasks, lines_per_task))
+        sync_file.close()
+        sync_console.stream.close()
+
+        # Queue handler + background listener
+        listener = setup_logging(log_file=os.path.join(tmp, "queued.log"), console=False)
+        queued_stats = asyncio.run(_measure_loop_stall(n_tasks, lines_per_task))
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+
+    print(f"{n_tasks} tasks x {lines_per_task} records, time the event loop is blocked in logging:")
+    print("  FileHandler + console : total {:.1f} ms, p99 {:.3f} ms, max {:.3f} ms".format(*sync_stats))
+    print("  QueueHandler          : total {:.1f} ms, p99 {:.3f} ms, max {:.3f} ms".format(*queued_stats))
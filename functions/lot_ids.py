@@ -0,0 +1,229 @@
+"""
+Canonical lot-ID handling.
+
+Grays lot URLs look like
+    https://www.grays.com/lot/0001-21060987/motor-vehicles-motor-cycles/2013-dodge-journey-...
+and the same lot has been seen under two category slugs
+(motor-vehicles-motor-cycles and motor-vehiclesmotor-cycles). The part that
+actually identifies the lot is "0001-21060987" (lot number - sale number), so
+that is what we dedupe and look up on. The slug is only kept as an attribute
+so the URL can be rebuilt when we need to visit the page.
+
+Lot IDs are packed into a single integer (sale * 10000 + lot) and stored in
+array-backed sets, which is several times smaller than keeping the full
+~130-character URLs in Python sets. Run this module directly to print a memory
+comparison for a 100k-lot history.
+"""
+
+import re
+import sys
+from array import array
+from bisect import bisect_left
+
+BASE_URL = "https://www.grays.com"
+
+# One lot-ID pattern shared by every parser: /lot/<lot no>-<sale no>
+LOT_ID_PATTERN = r"/lot/(\d{1,4})-(\d+)"
+LOT_ID_RE = re.compile(LOT_ID_PATTERN)
+LOT_URL_RE = re.compile(LOT_ID_PATTERN + r"(?:/([^?#]*))?")
+
+# Lot numbers are 4 digits, so the sale number goes above them
+LOT_NO_SPAN = 10_000
+
+# Pending adds are merged into the sorted array once the buffer reaches this size
+_MERGE_THRESHOLD = 1024
+
+
+def is_vehicle_lot_link(href: str) -> bool:
+    """True if href looks like a vehicle lot link we care about."""
+    if not href or "/lot/" not in href:
+        return False
+
+    # Accept both patterns (Grays has used both)
+    return ("motor-vehicles-motor-cycles" in href) or ("motor-vehiclesmotor-cycles" in href)
+
+
+def parse_lot_url(url):
+    """
+    Split a lot URL (absolute or relative) into (lot_id, slug).
+    lot_id is the canonical "0001-21060987" string, slug is the trailing path
+    (e.g. "motor-vehicles-motor-cycles/2013-dodge-journey-..."). Returns (None, None)
+    if `url` is not a lot URL.
+    """
+    if not url or not isinstance(url, str):
+        return None, None
+    match = LOT_URL_RE.search(url)
+    if not match:
+        return None, None
+    lot_no, sale_no, slug = match.groups()
+    return f"{int(lot_no):04d}-{sale_no}", (slug or "").strip("/")
+
+
+def lot_id(url):
+    """Return the canonical lot ID for `url`, or None if it is not a lot URL."""
+    return parse_lot_url(url)[0]
+
+
+def _pack(lot_no, sale_no):
+    return int(sale_no) * LOT_NO_SPAN + int(lot_no)
+
+
+def pack_lot_id(lot_id_str):
+    """Pack "0001-21060987" into a single int (21060987 * 10000 + 1). Raises ValueError if malformed."""
+    lot_no, sale_no = lot_id_str.split("-", 1)
+    return _pack(lot_no, sale_no)
+
+
+def unpack_lot_id(packed):
+    """Inverse of pack_lot_id."""
+    sale_no, lot_no = divmod(packed, LOT_NO_SPAN)
+    return f"{lot_no:04d}-{sale_no}"
+
+
+def packed_lot_id(url):
+    """
+    Parse and pack a lot URL in one go. Returns None if `url` is not a lot URL.
+    Same pattern as lot_id(), without building the ID string and slug.
+    """
+    match = LOT_ID_RE.search(url) if url else None
+    return _pack(*match.groups()) if match else None
+
+
+def lot_url(lot_id_str, slug=""):
+    """Rebuild the absolute lot URL from its ID and slug."""
+    url = f"{BASE_URL}/lot/{lot_id_str}"
+    return f"{url}/{slug}" if slug else url
+
+
+class LotIdSet:
+    """
+    Compact set of lot IDs backed by a sorted array('q') of packed IDs.
+
+    Accepts lot URLs, lot ID strings or packed ints wherever a lot is expected.
+    Membership is a binary search; new IDs are buffered in a small set and merged
+    into the array in batches so adds stay cheap.
+    """
+
+    def __init__(self, lots=()):
+        self._packed = array("q", sorted({p for p in map(self._to_packed, lots) if p is not None}))
+        self._pending = set()
+
+    @staticmethod
+    def _to_packed(lot):
+        if isinstance(lot, int):
+            return lot
+        if isinstance(lot, str):
+            if "/lot/" in lot:
+                return packed_lot_id(lot)
+            try:
+                return pack_lot_id(lot)
+            except ValueError:
+                return None
+        return None
+
+    def _in_array(self, packed):
+        i = bisect_left(self._packed, packed)
+        return i < len(self._packed) and self._packed[i] == packed
+
+    def _merge(self):
+        if self._pending:
+            merged = sorted(self._pending.union(self._packed))
+            self._packed = array("q", merged)
+            self._pending.clear()
+
+    def add(self, lot):
+        """Add a lot. Returns True if it was new, False if it was already present or not a lot."""
+        packed = self._to_packed(lot)
+        if packed is None or packed in self._pending or self._in_array(packed):
+            return False
+        self._pending.add(packed)
+        if len(self._pending) >= _MERGE_THRESHOLD:
+            self._merge()
+        return True
+
+    def discard(self, lot):
+        packed = self._to_packed(lot)
+        if packed is None:
+            return
+        self._pending.discard(packed)
+        i = bisect_left(self._packed, packed)
+        if i < len(self._packed) and self._packed[i] == packed:
+            del self._packed[i]
+
+    def __contains__(self, lot):
+        packed = self._to_packed(lot)
+        if packed is None:
+            return False
+        return packed in self._pending or self._in_array(packed)
+
+    def __len__(self):
+        return len(self._packed) + len(self._pending)
+
+    def __iter__(self):
+        self._merge()
+        return (unpack_lot_id(p) for p in self._packed)
+
+    def nbytes(self):
+        """Approximate memory used by the set, in bytes."""
+        return (sys.getsizeof(self._packed) + sys.getsizeof(self._pending)
+                + sum(sys.getsizeof(p) for p in self._pending))
+
+
+class LotLinks:
+    """
+    Ordered collection of pending lots keyed by packed lot ID, with the URL slug
+    kept as an attribute so the page URL can be rebuilt. Slug variants of the
+    same lot collapse to one entry (the first slug seen wins).
+    """
+
+    def __init__(self, urls=()):
+        self._slugs = {}
+        for url in urls:
+            self.add(url)
+
+    def add(self, url):
+        """Add a lot URL. Returns True if the lot was new."""
+        lid, slug = parse_lot_url(url)
+        if lid is None:
+            return False
+        packed = pack_lot_id(lid)
+        if packed in self._slugs:
+            return False
+        self._slugs[packed] = slug
+        return True
+
+    def discard(self, lot):
+        packed = LotIdSet._to_packed(lot)
+        if packed is not None:
+            self._slugs.pop(packed, None)
+
+    def __contains__(self, lot):
+        return LotIdSet._to_packed(lot) in self._slugs
+
+    def __len__(self):
+        return len(self._slugs)
+
+    def urls(self):
+        """Absolute URLs of all lots, in insertion order."""
+        return [lot_url(unpack_lot_id(p), slug) for p, slug in self._slugs.items()]
+
+
+def _url_set_nbytes(urls):
+    return sys.getsizeof(urls) + sum(sys.getsizeof(u) for u in urls)
+
+
+if __name__ == "__main__":
+    # Memory comparison for a 100k-lot history
+    n = 100_000
+    urls = {
+        f"{BASE_URL}/lot/{i % 200 + 1:04d}-{21000000 + i // 200}/motor-vehicles-motor-cycles/"
+        f"2013-dodge-journey-sxt-automatic-7-seats-wagon-{i}"
+        for i in range(n)
+    }
+    ids = LotIdSet(urls)
+    url_bytes = _url_set_nbytes(urls)
+    id_bytes = ids.nbytes()
+    print(f"{n:,} lots")
+    print(f"  set of URL strings : {url_bytes / 1e6:8.2f} MB")
+    print(f"  LotIdSet (array)   : {id_bytes / 1e6:8.2f} MB")
+    print(f"  saving             : {url_bytes / id_bytes:8.1f}x")
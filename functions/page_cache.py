@@ -0,0 +1,191 @@
+"""
+Per-page fingerprint cache for the search result pages.
+
+Most search pages barely change between crawls, so before rendering a page
+with Playwright we make a cheap conditional GET for it:
+  - if the server answers 304 Not Modified (ETag / Last-Modified match), the
+    page is skipped and its cached lot IDs are reused
+  - if the raw HTML already lists the lot links, the ordered lot IDs are
+    compared with the cached fingerprint; an identical list short-circuits the
+    page, a changed one is used directly without rendering
+  - otherwise (links only appear after JS runs) the page is rendered as before
+
+Validators and fingerprints are only trusted for pages whose lot IDs came from
+the raw HTML. A JS-rendered page can keep the same shell (and ETag) while its
+lots change, so rendered pages are stored without validators and are always
+rendered again; the conditional GET for them counts as bytes spent.
+
+A page only earns that trust by showing the same ordered lot IDs in its raw
+HTML as in a full render. Until then (first crawl, or a page whose raw HTML
+only holds part of the grid) it is rendered and the two lists are compared.
+
+Either way only lot IDs that were not on the page last time are handed back
+as new. The cache lives in SEARCH_CACHE_FILE, keyed by page number.
+"""
+
+import hashlib
+import logging
+import re
+from datetime import datetime
+from functions.json_store import load_json, save_json
+from functions.lot_ids import is_vehicle_lot_link, lot_id
+
+logger = logging.getLogger(__name__)
+
+SEARCH_CACHE_FILE = "CSV_data/search_page_cache.json"
+
+HREF_RE = re.compile(r"""href=["']([^"']*/lot/[^"']*)["']""")
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Outcomes of check_page
+NOT_MODIFIED = "not_modified"  # 304 from the server, nothing downloaded
+UNCHANGED = "unchanged"        # raw HTML has the same ordered lot IDs as last time
+CHANGED = "changed"            # raw HTML has lot links and they differ from last time
+VERIFY = "verify"              # raw HTML has lot links, but the page isn't trusted yet: render and compare
+RENDER = "render"              # no lot links in the raw HTML, needs a Playwright render
+
+# Where a cached page's lot IDs came from
+SOURCE_RAW = "raw"
+SOURCE_RENDER = "render"
+
+
+def extract_lot_links(html):
+    """Ordered vehicle lot hrefs from raw HTML, one per lot ID (first occurrence wins)."""
+    links, seen = [], set()
+    for href in HREF_RE.findall(html or ""):
+        lid = lot_id(href)
+        if lid and lid not in seen and is_vehicle_lot_link(href):
+            seen.add(lid)
+            links.append(href)
+    return links
+
+
+def fingerprint(lot_ids):
+    """Stable hash of an ordered list of lot IDs."""
+    return hashlib.sha1("\n".join(lot_ids).encode()).hexdigest()
+
+
+class SearchPageCache:
+    """
+    Ordered lot IDs and HTTP validators per search page, persisted to SEARCH_CACHE_FILE.
+
+    Entries look like:
+        {"lot_ids": [...], "fingerprint": "...", "source": "raw", "etag": "...",
+         "last_modified": "...", "bytes": 123456, "fetched": "..."}
+    """
+
+    def __init__(self, path=SEARCH_CACHE_FILE):
+        self.path = path
+        self.pages = load_json(path)
+        self.stats = {
+            "pages_checked": 0,
+            "pages_skipped": 0,
+            "pages_short_circuited": 0,
+            "pages_rendered": 0,
+            "bytes_avoided": 0,
+            "bytes_spent": 0,
+            "new_lots": 0,
+        }
+
+    def lot_ids(self, page_number):
+        """Lot IDs seen on the page last time, or None if the page is not cached."""
+        entry = self.pages.get(str(page_number))
+        return entry["lot_ids"] if entry else None
+
+    def from_raw(self, page_number):
+        """True if the cached lot IDs for the page came from its raw HTML (so validators can be trusted)."""
+        entry = self.pages.get(str(page_number))
+        return bool(entry) and entry.get("source") == SOURCE_RAW
+
+    def conditional_headers(self, page_number):
+        """If-None-Match / If-Modified-Since headers for the page, from its cached validators."""
+        if not self.from_raw(page_number):
+            return {}
+        entry = self.pages[str(page_number)]
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def update(self, page_number, lot_ids, response_headers=None, nbytes=0, source=SOURCE_RAW):
+        """
+        Store the page's ordered lot IDs after a fetch/render. Validators are only
+        kept when the IDs came from the raw HTML (source=SOURCE_RAW).
+        """
+        if source != SOURCE_RAW:
+            response_headers = None
+        response_headers = {k.lower(): v for k, v in (response_headers or {}).items()}
+        self.pages[str(page_number)] = {
+            "lot_ids": list(lot_ids),
+            "fingerprint": fingerprint(lot_ids),
+            "source": source,
+            "etag": response_headers.get("etag"),
+            "last_modified": response_headers.get("last-modified"),
+            "bytes": nbytes,
+            "fetched": datetime.now().strftime(TIME_FORMAT),
+        }
+
+    def new_lot_ids(self, page_number, lot_ids):
+        """Lot IDs in `lot_ids` that were not on the cached version of the page."""
+        previous = set(self.lot_ids(page_number) or ())
+        return [lid for lid in lot_ids if lid not in previous]
+
+    def save(self):
+        save_json(self.path, self.pages)
+
+    def log_stats(self):
+        s = self.stats
+        logger.info(
+            f"Search pages: {s['pages_checked']} checked, {s['pages_skipped']} skipped (304), "
+            f"{s['pages_short_circuited']} unchanged, {s['pages_rendered']} rendered, "
+            f"{s['bytes_avoided']:,} bytes avoided, {s['bytes_spent']:,} bytes spent on checks "
+            f"for rendered pages, {s['new_lots']} new lots."
+        )
+
+
+async def check_page(fetch, url, page_number, cache):
+    """
+    Conditionally fetch a search page and decide whether it needs rendering.
+
+    `fetch(url, headers)` is a coroutine returning (status, response_headers, body_bytes).
+    Returns (outcome, links, response_headers, nbytes) where outcome is one of NOT_MODIFIED,
+    UNCHANGED, CHANGED, VERIFY or RENDER, and links is the ordered list of lot hrefs found
+    in the raw HTML (empty for NOT_MODIFIED and RENDER).
+    """
+    cache.stats["pages_checked"] += 1
+    cached = cache.pages.get(str(page_number))
+    trusted = cache.from_raw(page_number)
+
+    try:
+        status, headers, body = await fetch(url, cache.conditional_headers(page_number))
+    except Exception as e:
+        # The render path still works without the cheap check
+        logger.warning(f"Conditional fetch failed for page {page_number}, rendering instead: {e}")
+        return RENDER, [], {}, 0
+
+    if status == 304 and trusted:
+        cache.stats["pages_skipped"] += 1
+        cache.stats["bytes_avoided"] += cached.get("bytes", 0)
+        return NOT_MODIFIED, [], headers, 0
+
+    nbytes = len(body or b"")
+    links = extract_lot_links(body.decode("utf-8", errors="replace")) if status == 200 else []
+    if not links:
+        # The check bought us nothing; the page still has to be rendered
+        cache.stats["bytes_spent"] += nbytes
+        return RENDER, [], headers, nbytes
+
+    if not trusted:
+        # The raw links may only be part of the grid; the caller renders and compares
+        cache.stats["bytes_spent"] += nbytes
+        return VERIFY, links, headers, nbytes
+
+    ids = [lot_id(href) for href in links]
+    if cached.get("fingerprint") == fingerprint(ids):
+        cache.stats["pages_short_circuited"] += 1
+        return UNCHANGED, links, headers, nbytes
+    return CHANGED, links, headers, nbytes
+
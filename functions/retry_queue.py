@@ -0,0 +1,145 @@
+"""
+Deferred retry queue for lots that came back 'unknown' or 'error'.
+
+Instead of burning several back-to-back attempts (and a concurrency slot) on a
+lot that will not resolve, a failed lot is pushed into this queue and skipped
+until its next retry time. The wait doubles with every failure so the same
+stubborn lots do not get re-tried on every run.
+
+After MAX_FAILURES failures the lot is dead-lettered: it is dropped from the
+queue, recorded in DEAD_LETTER_FILE together with its failure history, and the
+last HTML we saw for it is written to DEAD_LETTER_HTML_DIR for diagnosis.
+"""
+
+import logging
+import os
+from datetime import datetime, timedelta
+from functions.json_store import load_json, save_json
+from functions.lot_ids import lot_id
+
+logger = logging.getLogger(__name__)
+
+# Where the queue and dead-letter data live
+RETRY_QUEUE_FILE = "CSV_data/retry_queue.json"
+DEAD_LETTER_FILE = "CSV_data/dead_letter.json"
+DEAD_LETTER_HTML_DIR = "CSV_data/dead_letter_html"
+
+# Failures allowed before a lot is dead-lettered
+MAX_FAILURES = 5
+
+# Retry spacing: BASE * 2 ** (failures - 1), capped at MAX
+BASE_DELAY_HOURS = 6
+MAX_DELAY_HOURS = 96
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def retry_delay(failures):
+    """Return the timedelta to wait after a lot's `failures`-th failure."""
+    hours = BASE_DELAY_HOURS * (2 ** max(failures - 1, 0))
+    return timedelta(hours=min(hours, MAX_DELAY_HOURS))
+
+
+def _lot_key(url):
+    """Key entries on the canonical lot ID so slug variants share one history."""
+    return lot_id(url) or url
+
+
+class RetryQueue:
+    """
+    Failure history and retry schedule for lots, persisted to RETRY_QUEUE_FILE.
+
+    Entries are keyed by lot ID (e.g. "0001-21060987") and look like:
+        {"failures": 2, "next_attempt": "...", "history": [{"time": "...", "status": "unknown"}]}
+    """
+
+    def __init__(self, path=RETRY_QUEUE_FILE, dead_letter_path=DEAD_LETTER_FILE,
+                 html_dir=DEAD_LETTER_HTML_DIR, max_failures=MAX_FAILURES):
+        self.path = path
+        self.dead_letter_path = dead_letter_path
+        self.html_dir = html_dir
+        self.max_failures = max_failures
+        self.entries = load_json(path)
+        self.dead_letters = load_json(dead_letter_path)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def attempt(self, url):
+        """1-based attempt number for the lot's current check (previous failures + 1)."""
+        entry = self.entries.get(_lot_key(url))
+        return (entry["failures"] if entry else 0) + 1
+
+    def is_dead(self, url):
+        """True if the lot has already been dead-lettered."""
+        return _lot_key(url) in self.dead_letters
+
+    def is_due(self, url, now=None):
+        """True if the lot may be attempted now (not queued, or its retry time has passed)."""
+        key = _lot_key(url)
+        if key in self.dead_letters:
+            return False
+        entry = self.entries.get(key)
+        if not entry:
+            return True
+        now = now or datetime.now()
+        try:
+            return now >= datetime.strptime(entry["next_attempt"], TIME_FORMAT)
+        except (KeyError, ValueError):
+            return True
+
+    def record_failure(self, url, status, page=None, now=None):
+        """
+        Record an 'unknown'/'error' result for `url`.
+        `page` is the last HTML seen (a string or a BeautifulSoup); it is only
+        serialised if the lot gets dead-lettered.
+        Returns True if the lot was dead-lettered by this failure, False if it was re-queued.
+        """
+        now = now or datetime.now()
+        key = _lot_key(url)
+        entry = self.entries.setdefault(key, {"failures": 0, "history": []})
+        entry["failures"] += 1
+        entry["history"].append({"time": now.strftime(TIME_FORMAT), "status": status})
+
+        if entry["failures"] >= self.max_failures:
+            self._dead_letter(key, url, entry, page)
+            return True
+
+        entry["next_attempt"] = (now + retry_delay(entry["failures"])).strftime(TIME_FORMAT)
+        return False
+
+    def record_success(self, url):
+        """Forget any failure history once a lot resolves to a definite status."""
+        self.entries.pop(_lot_key(url), None)
+
+    def revive(self, url):
+        """Take a lot back out of the dead-letter file (e.g. after a classifier fix) with a clean history."""
+        key = _lot_key(url)
+        self.dead_letters.pop(key, None)
+        self.entries.pop(key, None)
+
+    def _dead_letter(self, key, url, entry, page):
+        """Move a lot from the queue to the dead-letter file, keeping its HTML if we have it."""
+        self.entries.pop(key, None)
+        html_path = None
+        html = str(page) if page is not None else None
+        if html:
+            os.makedirs(self.html_dir, exist_ok=True)
+            html_path = os.path.join(self.html_dir, f"{key}.html".replace("/", "_"))
+            try:
+                with open(html_path, "w", encoding="utf-8") as f:
+                    f.write(html)
+            except OSError as e:
+                logger.error(f"Could not save dead-letter HTML for {url}: {e}")
+                html_path = None
+        self.dead_letters[key] = {
+            "url": url,
+            "failures": entry["failures"],
+            "history": entry["history"],
+            "html": html_path,
+        }
+
+    def save(self):
+        """Persist the queue and the dead-letter file."""
+        save_json(self.path, self.entries)
+        save_json(self.dead_letter_path, self.dead_letters)
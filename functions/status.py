@@ -1,5 +1,9 @@
 # status.py
 
+import logging
+
+logger = logging.getLogger(__name__)
+
 def still_auctioning(soup):
     """Return True if the auction is still running (e.g., a current bid is shown)."""
     try:
@@ -9,7 +13,7 @@ def still_auctioning(soup):
             if len(text_parts) >= 2 and text_parts[0] == "Current" and text_parts[1] == "Bid":
                 return True
     except Exception as e:
-        print(f"Error in still_auctioning: {e}")
+        logger.error(f"Error in still_auctioning: {e}")
     return False
 
 def cancelled_auction(soup):
@@ -24,7 +28,7 @@ def cancelled_auction(soup):
             if "Cancelled" in title_text and salepage_text:
                 return True
     except Exception as e:
-        print(f"Error in cancelled_auction: {e}")
+        logger.error(f"Error in cancelled_auction: {e}")
     return False
 
 def auction_referred(soup):
@@ -34,7 +38,7 @@ def auction_referred(soup):
         if heading_div and ('referred' in heading_div.text.lower() or 'closed' in heading_div.text.lower()):
             return True
     except Exception as e:
-        print(f"Error in auction_referred: {e}")
+        logger.error(f"Error in auction_referred: {e}")
     return False
 
 def auction_sold(soup):
@@ -52,5 +56,5 @@ def auction_sold(soup):
                 price = None
             return True, price
     except Exception as e:
-        print(f"Error in auction_sold: {e}")
+        logger.error(f"Error in auction_sold: {e}")
     return False, None
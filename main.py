@@ -1,121 +1,155 @@
-import asyncio
-import os
+"""
+Grays scraper entry point.
+
+    python main.py               collect new links, then check them (what Run main.bat does)
+    python main.py collect       collect new lot links from the search pages
+    python main.py check         check the status of pending lots and save sold/referred cars
+    python main.py export        rewrite the website JSON files from the CSVs
+    python main.py stats         counts of pending, queued, dead-lettered and scraped lots
+    python main.py replay        re-classify dead-lettered lots from their saved HTML
+
+Heavy dependencies (pandas, Playwright, BeautifulSoup, colorlog, tqdm) are only
+imported inside the subcommand that needs them, and nothing touches the disk
+at import time, so light commands like `stats` start quickly.
+"""
+
+import argparse
+import csv
 import logging
-from pathlib import Path
-from colorlog import ColoredFormatter
-from playwright.async_api import async_playwright
-import pandas as pd
-from tqdm import tqdm
-from functions.columns import columns_list
-from functions.check_status import extract_url_status
-from functions.extract_details import extract_vehicle_details
-from functions.collect_links import collect_car_links
-
-# Setup logging with color
-if not os.path.exists('logs'):
-    os.makedirs('logs')
-
-class CustomColorFormatter(ColoredFormatter):
-    def format(self, record):
-        msg = record.getMessage().lower()
-        if 'referred' in msg:
-            self.log_colors['INFO'] = 'cyan'
-        elif 'sold' in msg:
-            self.log_colors['INFO'] = 'green'
-        elif 'cancelled' in msg:
-            self.log_colors['INFO'] = 'red'
-        elif 'auctioning' in msg:
-            self.log_colors['INFO'] = 'purple'
-        else:
-            self.log_colors['INFO'] = 'white'
-        return super().format(record)
-
-console_handler = logging.StreamHandler()
-console_handler.setFormatter(CustomColorFormatter(
-    "%(log_color)s%(asctime)s [%(levelname)s] %(message)s",
-    datefmt='%Y-%m-%d %H:%M:%S',
-    log_colors={
-        'DEBUG': 'cyan',
-        'INFO': 'white',
-        'WARNING': 'yellow',
-        'ERROR': 'red',
-        'CRITICAL': 'bold_red',
-    }
-))
-
-file_handler = logging.FileHandler('logs/scraping.log')
-file_handler.setFormatter(logging.Formatter('%(asctime)s [%(levelname)s] %(message)s'))
-
-logger = logging.getLogger()
-logger.handlers = []
-logger.addHandler(console_handler)
-logger.addHandler(file_handler)
-logger.setLevel(logging.INFO)
+import os
+import sys
+from functions.csv_store import read_link_column, write_car_links
+from functions.retry_queue import RetryQueue
+from functions.lot_ids import LotIdSet, LotLinks, lot_id
+
+logger = logging.getLogger(__name__)
+
+CAR_LINKS_CSV = 'CSV_data/car_links.csv'
+SOLD_CSV = 'CSV_data/sold_cars.csv'
+REFERRED_CSV = 'CSV_data/referred_cars.csv'
+SCRAPED_CSV = 'CSV_data/scraped_links.csv'
+JSON_DIR = '../soldcartracker.github.io/JSON_data'
+
+
+def write_json(sold_cars_df, referred_df):
+    """Write the sold/referred dataframes as JSON lines for the website."""
+    os.makedirs(JSON_DIR, exist_ok=True)
+    sold_cars_df.to_json(os.path.join(JSON_DIR, 'sold_cars.json'), orient='records', lines=True)
+    referred_df.to_json(os.path.join(JSON_DIR, 'referred_cars.json'), orient='records', lines=True)
+
 
 async def main():
+    """Collect new links, then check every pending lot."""
+    from functions.collect_links import collect_car_links
+
     await collect_car_links()
+    await check_links()
+
+
+async def check_links():
+    """Check the status of pending lots and record sold/referred vehicles."""
+    import asyncio
+    import pandas as pd
+    from playwright.async_api import async_playwright
+    from tqdm import tqdm
+    from functions.check_status import extract_url_status
+    from functions.columns import columns_list
+    from functions.extract_details import extract_vehicle_details
 
     try:
-        car_links_df = pd.read_csv('CSV_data/car_links.csv')
-        car_links = car_links_df['Car Links'].tolist()
-        logging.info(f"Loaded {len(car_links)} car links from CSV.")
+        car_links_df = pd.read_csv(CAR_LINKS_CSV)
+        # Keyed by lot ID, so slug variants of the same lot collapse to one entry
+        car_links = LotLinks(car_links_df['Car Links'].dropna().astype(str))
+        logger.info(f"Loaded {len(car_links)} car links from CSV.")
     except FileNotFoundError:
-        logging.warning("Car links CSV not found. Starting with an empty list.")
-        car_links = []
+        logger.warning("Car links CSV not found. Starting with an empty list.")
+        car_links = LotLinks()
         car_links_df = pd.DataFrame(columns=['Car Links'])
 
     try:
-        sold_cars_df = pd.read_csv('CSV_data/sold_cars.csv')
+        sold_cars_df = pd.read_csv(SOLD_CSV)
         existing_vin_dates_sold = set(zip(sold_cars_df['VIN'].fillna(''), sold_cars_df['date'].fillna('')))
-        logging.info(f"Loaded {len(existing_vin_dates_sold)} existing sold car records.")
+        logger.info(f"Loaded {len(existing_vin_dates_sold)} existing sold car records.")
     except FileNotFoundError:
         sold_cars_df = pd.DataFrame(columns=columns_list())
         existing_vin_dates_sold = set()
-        logging.warning("No existing sold car records found.")
+        logger.warning("No existing sold car records found.")
 
     try:
-        referred_df = pd.read_csv('CSV_data/referred_cars.csv')
+        referred_df = pd.read_csv(REFERRED_CSV)
         existing_vin_dates_referred = set(zip(referred_df['VIN'].fillna(''), referred_df['date'].fillna('')))
-        logging.info(f"Loaded {len(existing_vin_dates_referred)} existing referred car records.")
+        logger.info(f"Loaded {len(existing_vin_dates_referred)} existing referred car records.")
     except FileNotFoundError:
         referred_df = pd.DataFrame(columns=columns_list())
         existing_vin_dates_referred = set()
-        logging.warning("No existing referred car records found.")
+        logger.warning("No existing referred car records found.")
 
     try:
-        scraped_links_df = pd.read_csv('CSV_data/scraped_links.csv')
-        logging.info(f"Loaded {len(scraped_links_df)} existing scraped links.")
+        scraped_links_df = pd.read_csv(SCRAPED_CSV)
+        logger.info(f"Loaded {len(scraped_links_df)} existing scraped links.")
     except FileNotFoundError:
         scraped_links_df = pd.DataFrame(columns=['Referred_URL', 'Sold_URL'])
-        logging.warning("No existing scraped links found.")
+        logger.warning("No existing scraped links found.")
+
+    retry_queue = RetryQueue()
+    logger.info(f"Loaded {len(retry_queue)} lots in the retry queue.")
+
+    # Dead-lettered lots are no longer pending
+    for link in car_links.urls():
+        if retry_queue.is_dead(link):
+            car_links.discard(link)
 
-    if not car_links:
-        logging.info("No car links to process. Exiting.")
+    # Lots still waiting out their retry delay stay in car_links but are skipped this run
+    car_links_copy = [link for link in car_links.urls() if retry_queue.is_due(link)]
+    deferred = len(car_links) - len(car_links_copy)
+    if deferred:
+        logger.info(f"Deferred {deferred} lots until their next retry time.")
+
+    if not car_links_copy:
+        logger.info("No car links to process. Exiting.")
         return
 
     async with async_playwright() as p:
         browser = await p.chromium.launch(headless=True)
         batch_size = 8
-        progress = tqdm(total=len(car_links), desc="Processing car links", unit="link")
-
-        car_links_copy = car_links.copy()
+        progress = tqdm(total=len(car_links_copy), desc="Processing car links", unit="link")
 
         for batch_start in range(0, len(car_links_copy), batch_size):
             batch_links = car_links_copy[batch_start: batch_start + batch_size]
-            tasks = [extract_url_status(link, browser) for link in batch_links]
+            tasks = [extract_url_status(link, browser, attempt=retry_queue.attempt(link)) for link in batch_links]
             results = await asyncio.gather(*tasks)
 
-            for status_code, soup, price, url in results:
+            for status_code, soup, price, url, duration in results:
+                # Structured fields for the JSON log record (and console colour)
+                extra = {
+                    'lot_id': lot_id(url),
+                    'url': url,
+                    'status': status_code,
+                    'attempt': retry_queue.attempt(url),
+                    'duration': duration,
+                }
+
+                if status_code in ('unknown', 'error'):
+                    if retry_queue.record_failure(url, status_code, soup):
+                        logger.error(f"Giving up on URL after {retry_queue.max_failures} failures (dead-lettered): {url}", extra=extra)
+                        car_links.discard(url)
+                    elif status_code == 'unknown':
+                        logger.warning(f"Status unknown for URL (queued for retry): {url}", extra=extra)
+                    else:
+                        logger.error(f"Failed to retrieve URL (queued for retry): {url}", extra=extra)
+                    continue
+
+                retry_queue.record_success(url)
+
                 if status_code == 'running':
-                    logging.info(f"Still auctioning: {url}")
+                    logger.info(f"Still auctioning: {url}", extra=extra)
 
                 elif status_code == 'cancelled':
-                    logging.info(f"Cancelled auction: {url}")
-                    if url in car_links:
-                        car_links.remove(url)
+                    logger.info(f"Cancelled auction: {url}", extra=extra)
+                    car_links.discard(url)
 
                 elif status_code == 'referred':
-                    logging.info(f"Auction referred (no sale): {url}")
+                    logger.info(f"Auction referred (no sale): {url}", extra=extra)
                     details = extract_vehicle_details(soup, {}) or {}
                     details['price'] = 0
                     details['url'] = url
@@ -125,17 +159,16 @@ async def main():
                     if vin_date not in existing_vin_dates_referred:
                         referred_df = pd.concat([referred_df, pd.DataFrame([row_data])], ignore_index=True)
                         existing_vin_dates_referred.add(vin_date)
-                        logging.info("Added new referred vehicle to referred_df.")
+                        logger.info("Added new referred vehicle to referred_df.", extra=extra)
                     else:
-                        logging.info("Referred vehicle already recorded (duplicate VIN-date).")
+                        logger.info("Referred vehicle already recorded (duplicate VIN-date).", extra=extra)
 
-                    if url in car_links:
-                        car_links.remove(url)
+                    car_links.discard(url)
                     new_entry = {'Referred_URL': url, 'Sold_URL': ''}
                     scraped_links_df = pd.concat([scraped_links_df, pd.DataFrame([new_entry])], ignore_index=True)
 
                 elif status_code == 'sold':
-                    logging.info(f"Auction sold: {url} for ${price}")
+                    logger.info(f"Auction sold: {url} for ${price}", extra=extra)
                     details = extract_vehicle_details(soup, {}) or {}
                     details['price'] = price if price is not None else 0
                     details['url'] = url
@@ -145,39 +178,150 @@ async def main():
                     if vin_date not in existing_vin_dates_sold:
                         sold_cars_df = pd.concat([sold_cars_df, pd.DataFrame([row_data])], ignore_index=True)
                         existing_vin_dates_sold.add(vin_date)
-                        logging.info("Added new sold vehicle to sold_cars_df.")
+                        logger.info("Added new sold vehicle to sold_cars_df.", extra=extra)
                     else:
-                        logging.info("Sold vehicle already recorded (duplicate VIN-date).")
+                        logger.info("Sold vehicle already recorded (duplicate VIN-date).", extra=extra)
 
-                    if url in car_links:
-                        car_links.remove(url)
+                    car_links.discard(url)
                     new_entry = {'Referred_URL': '', 'Sold_URL': url}
                     scraped_links_df = pd.concat([scraped_links_df, pd.DataFrame([new_entry])], ignore_index=True)
 
-                else:
-                    if status_code == 'unknown':
-                        logging.warning(f"Status unknown for URL (will retry later): {url}")
-                    elif status_code == 'error':
-                        logging.error(f"Failed to retrieve URL (will retry later): {url}")
+            car_links_df = pd.DataFrame(car_links.urls(), columns=['Car Links'])
+            car_links_df.to_csv(CAR_LINKS_CSV, index=False)
+            referred_df.to_csv(REFERRED_CSV, index=False)
+            sold_cars_df.to_csv(SOLD_CSV, index=False)
+            write_json(sold_cars_df, referred_df)
+            scraped_links_df.to_csv(SCRAPED_CSV, index=False)
+            retry_queue.save()
 
+            progress.update(len(batch_links))
 
-            # Ensure JSON output folder exists
-            out_dir = Path("../soldcartracker.github.io/JSON_data")
-            out_dir.mkdir(parents=True, exist_ok=True)
+        await browser.close()
+        progress.close()
 
+def _count_rows(path):
+    try:
+        with open(path, newline='', encoding='utf-8') as f:
+            return max(sum(1 for _ in csv.reader(f)) - 1, 0)
+    except FileNotFoundError:
+        return 0
 
-            car_links_df = pd.DataFrame(car_links, columns=['Car Links'])
-            car_links_df.to_csv('CSV_data/car_links.csv', index=False)
-            referred_df.to_csv('CSV_data/referred_cars.csv', index=False)
-            sold_cars_df.to_csv('CSV_data/sold_cars.csv', index=False)
-            sold_cars_df.to_json('../soldcartracker.github.io/JSON_data/sold_cars.json', orient='records', lines=True)
-            referred_df.to_json('../soldcartracker.github.io/JSON_data/referred_cars.json', orient='records', lines=True)   
-            scraped_links_df.to_csv('CSV_data/scraped_links.csv', index=False)
 
-            progress.update(len(batch_links))
+def _run_logged(coro_fn):
+    """Run an async job with the queue-based logging set up for its duration."""
+    import asyncio
+    from functions.logging_setup import setup_logging
+
+    listener = setup_logging()
+    try:
+        asyncio.run(coro_fn())
+    finally:
+        listener.stop()
+
+
+def cmd_run(args):
+    _run_logged(main)
+
+
+def cmd_collect(args):
+    from functions.collect_links import collect_car_links
+
+    _run_logged(collect_car_links)
+
+
+def cmd_check(args):
+    _run_logged(check_links)
+
+
+def cmd_export(args):
+    import pandas as pd
+    from functions.columns import columns_list
+
+    def read_or_empty(path):
+        try:
+            return pd.read_csv(path)
+        except FileNotFoundError:
+            print(f"{path} not found, exporting it as empty.")
+            return pd.DataFrame(columns=columns_list())
+
+    sold_cars_df = read_or_empty(SOLD_CSV)
+    referred_df = read_or_empty(REFERRED_CSV)
+    write_json(sold_cars_df, referred_df)
+    print(f"Exported {len(sold_cars_df)} sold and {len(referred_df)} referred cars to {JSON_DIR}.")
+
+
+def cmd_stats(args):
+    from functions.page_cache import SearchPageCache
+
+    car_links = LotLinks(read_link_column(CAR_LINKS_CSV, 'Car Links'))
+    retry_queue = RetryQueue()
+    due = sum(1 for url in car_links.urls() if retry_queue.is_due(url))
+    scraped = LotIdSet(read_link_column(SCRAPED_CSV, 'Referred_URL', 'Sold_URL'))
+    page_cache = SearchPageCache()
+
+    print(f"Pending lots        : {len(car_links)} ({due} due now, {len(car_links) - due} deferred)")
+    print(f"Retry queue         : {len(retry_queue)}")
+    print(f"Dead-lettered       : {len(retry_queue.dead_letters)}")
+    print(f"Scraped lots        : {len(scraped)}")
+    print(f"Sold cars           : {_count_rows(SOLD_CSV)}")
+    print(f"Referred cars       : {_count_rows(REFERRED_CSV)}")
+    print(f"Cached search pages : {len(page_cache.pages)}")
+
+
+def cmd_replay(args):
+    retry_queue = RetryQueue()
+    if not retry_queue.dead_letters:
+        print("No dead-lettered lots.")
+        return
+
+    from bs4 import BeautifulSoup
+    from functions.check_status import classify_soup
+
+    car_links = LotLinks(read_link_column(CAR_LINKS_CSV, 'Car Links'))
+    revived = 0
+
+    for key, entry in sorted(retry_queue.dead_letters.items()):
+        html_path = entry.get('html')
+        if not html_path or not os.path.exists(html_path):
+            print(f"{key}: no saved HTML")
+            continue
+        with open(html_path, encoding='utf-8') as f:
+            status_code, price = classify_soup(BeautifulSoup(f.read(), 'html.parser'))
+        print(f"{key}: {status_code}" + (f" (${price})" if price is not None else ""))
+
+        if args.requeue and status_code != 'unknown':
+            url = entry.get('url') or key
+            retry_queue.revive(url)
+            car_links.add(url)
+            revived += 1
+
+    if args.requeue and revived:
+        retry_queue.save()
+        write_car_links(CAR_LINKS_CSV, car_links.urls())
+        print(f"Re-queued {revived} lots into {CAR_LINKS_CSV}.")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Grays auction scraper.")
+    parser.set_defaults(func=cmd_run)
+    sub = parser.add_subparsers(title="commands")
+
+    sub.add_parser("collect", help="collect new lot links").set_defaults(func=cmd_collect)
+    sub.add_parser("check", help="check pending lots and save sold/referred cars").set_defaults(func=cmd_check)
+    sub.add_parser("export", help="write the website JSON files from the CSVs").set_defaults(func=cmd_export)
+    sub.add_parser("stats", help="show pending/queued/scraped counts").set_defaults(func=cmd_stats)
+
+    replay = sub.add_parser("replay", help="re-classify dead-lettered lots from their saved HTML")
+    replay.add_argument("--requeue", action="store_true",
+                        help="move lots that now classify back into car_links.csv")
+    replay.set_defaults(func=cmd_replay)
+    return parser
+
+
+def cli(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
 
-        await browser.close()
-        progress.close()
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    sys.exit(cli())
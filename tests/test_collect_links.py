@@ -0,0 +1,200 @@
+"""collect_car_links against a stub search site whose pages change between runs."""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+
+import pytest
+
+from functions.collect_links import CSV_FILE, collect_car_links
+from functions.csv_store import read_link_column
+from functions.page_cache import SEARCH_CACHE_FILE
+from functions.retry_queue import DEAD_LETTER_FILE
+
+JS_SHELL = b"<html><body><div id='app'></div><script src='/app.js'></script></body></html>"
+
+
+def lot_href(lid):
+    return f"/lot/{lid}/motor-vehicles-motor-cycles/car-{lid}"
+
+
+class StubPages:
+    """
+    Stands in for PlaywrightSearchPages.
+
+    `site` maps page number -> {"kind": "raw" | "js", "lots": [...], "raw_lots": [...], "filler": str}.
+    Raw pages list their lots in the HTML (only `raw_lots`, if given, for a grid
+    that JS fills in); JS pages always serve the same shell (and so the same
+    ETag) and only show their lots when rendered. Pages not in `site` are empty.
+    """
+
+    def __init__(self, site):
+        self.site = site
+        self.fetches = []
+        self.renders = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    @staticmethod
+    def _page_number(url):
+        return int(re.search(r"page=(\d+)", url).group(1))
+
+    def _body(self, page_number):
+        page = self.site.get(page_number)
+        if page is None or page["kind"] == "js":
+            return JS_SHELL
+        links = "".join(f'<a href="{lot_href(lid)}">x</a>' for lid in page.get("raw_lots", page["lots"]))
+        return f"<html><body>{links}{page.get('filler', '')}</body></html>".encode()
+
+    async def fetch(self, url, headers):
+        page_number = self._page_number(url)
+        self.fetches.append((page_number, dict(headers)))
+        body = self._body(page_number)
+        etag = '"%s"' % hashlib.sha1(body).hexdigest()
+        if headers.get("If-None-Match") == etag:
+            return 304, {"ETag": etag}, b""
+        return 200, {"ETag": etag}, body
+
+    async def render(self, url):
+        page_number = self._page_number(url)
+        self.renders.append(page_number)
+        page = self.site.get(page_number)
+        return [lot_href(lid) for lid in page["lots"]] if page else []
+
+
+def crawl(site):
+    pages = StubPages(site)
+    stats = asyncio.run(collect_car_links(pages=pages, page_delay=(0, 0)))
+    return pages, stats
+
+
+def collected_ids():
+    return sorted(re.search(r"/lot/([^/]+)", url).group(1) for url in read_link_column(CSV_FILE, "Car Links"))
+
+
+@pytest.fixture(autouse=True)
+def in_tmp(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+
+def test_js_page_is_rendered_again_when_its_lots_change():
+    site = {1: {"kind": "js", "lots": ["0001-100"]}}
+    pages, _ = crawl(site)
+    assert collected_ids() == ["0001-100"]
+
+    # Same shell and ETag, but JS now shows another lot
+    site[1]["lots"] = ["0002-100", "0001-100"]
+    pages, stats = crawl(site)
+
+    assert pages.fetches[0] == (1, {})  # no validators sent for a rendered page
+    assert pages.renders == [1, 2]
+    assert stats["pages_skipped"] == 0
+    assert stats["new_lots"] == 1
+    assert stats["bytes_spent"] == 2 * len(JS_SHELL)
+    assert collected_ids() == ["0001-100", "0002-100"]
+
+
+def test_raw_page_is_rendered_and_compared_on_first_crawl():
+    site = {1: {"kind": "raw", "lots": ["0001-100", "0002-100"]}}
+    pages, stats = crawl(site)
+    assert pages.renders == [1, 2]
+    assert stats["new_lots"] == 2
+
+    # Raw HTML matched the render, so validators are sent next time
+    pages, _ = crawl(site)
+    assert "If-None-Match" in pages.fetches[0][1]
+
+
+def test_partial_raw_grid_is_not_trusted():
+    site = {1: {"kind": "raw", "lots": ["0001-100", "0002-100", "0003-100"], "raw_lots": ["0001-100"]}}
+    pages, _ = crawl(site)
+    assert pages.renders == [1, 2]
+    assert collected_ids() == ["0001-100", "0002-100", "0003-100"]
+
+    # Still rendered (and no validators sent) on the next crawl
+    site[1]["lots"].append("0004-100")
+    pages, stats = crawl(site)
+    assert pages.fetches[0] == (1, {})
+    assert pages.renders == [1, 2]
+    assert stats["pages_skipped"] == stats["pages_short_circuited"] == 0
+    assert stats["new_lots"] == 1
+    assert collected_ids() == ["0001-100", "0002-100", "0003-100", "0004-100"]
+
+
+def test_unmodified_raw_page_is_skipped():
+    site = {1: {"kind": "raw", "lots": ["0001-100", "0002-100"]}}
+    crawl(site)
+
+    pages, stats = crawl(site)
+    assert "If-None-Match" in pages.fetches[0][1]
+    assert stats["pages_skipped"] == 1
+    assert pages.renders == [2]  # only the empty end page
+    assert stats["new_lots"] == 0
+
+
+def test_raw_page_with_same_lots_short_circuits_render():
+    site = {1: {"kind": "raw", "lots": ["0001-100", "0002-100"], "filler": "a"}}
+    crawl(site)
+
+    site[1]["filler"] = "b"  # body (and ETag) change, lots stay in the same order
+    pages, stats = crawl(site)
+    assert stats["pages_skipped"] == 0
+    assert stats["pages_short_circuited"] == 1
+    assert pages.renders == [2]
+    assert stats["new_lots"] == 0
+
+
+def test_only_new_lot_ids_are_processed():
+    site = {1: {"kind": "raw", "lots": ["0001-100", "0002-100"]}}
+    crawl(site)
+
+    site[1]["lots"] = ["0003-100", "0001-100", "0002-100"]
+    _, stats = crawl(site)
+    assert stats["new_lots"] == 1
+    assert collected_ids() == ["0001-100", "0002-100", "0003-100"]
+
+
+def test_not_modified_page_with_no_cached_lots_stops_the_crawl():
+    site = {1: {"kind": "raw", "lots": ["0001-100"]}}
+    crawl(site)
+
+    # A raw page cached with no lots (e.g. a "no results" page) that hasn't changed
+    site[2] = {"kind": "raw", "lots": []}
+    pages = StubPages(site)
+    etag = '"%s"' % hashlib.sha1(pages._body(2)).hexdigest()
+    with open(SEARCH_CACHE_FILE) as f:
+        cache = json.load(f)
+    cache["2"] = {"lot_ids": [], "fingerprint": "", "source": "raw", "etag": etag, "bytes": 10}
+    with open(SEARCH_CACHE_FILE, "w") as f:
+        json.dump(cache, f)
+
+    stats = asyncio.run(collect_car_links(pages=pages, page_delay=(0, 0)))
+    assert stats["pages_skipped"] == 2
+    assert pages.renders == []
+    assert [n for n, _ in pages.fetches] == [1, 2]
+
+
+def test_unparsable_rendered_href_does_not_abort_the_crawl():
+    site = {
+        1: {"kind": "js", "lots": ["12345-100", "0001-100"]},
+        2: {"kind": "js", "lots": ["0002-100"]},
+    }
+    pages, _ = crawl(site)
+    assert pages.renders == [1, 2, 3]
+    assert collected_ids() == ["0001-100", "0002-100"]
+
+
+def test_dead_lettered_lots_are_not_collected():
+    os.makedirs(os.path.dirname(DEAD_LETTER_FILE), exist_ok=True)
+    with open(DEAD_LETTER_FILE, "w") as f:
+        json.dump({"0002-100": {"url": lot_href("0002-100"), "failures": 5, "history": [], "html": None}}, f)
+
+    _, stats = crawl({1: {"kind": "raw", "lots": ["0001-100", "0002-100"]}})
+    assert stats["new_lots"] == 1
+    assert collected_ids() == ["0001-100"]
@@ -0,0 +1,39 @@
+"""Light CLI commands must not import heavy dependencies or spend long importing (python -X importtime)."""
+
+import json
+
+import pytest
+
+from functions.import_bench import HEAVY_MODULES, IMPORT_BUDGET_MS, MAIN_PY, run_case, total_import_ms
+
+LOT = "https://www.grays.com/lot/{}/motor-vehicles-motor-cycles/car"
+
+
+@pytest.fixture
+def small_dataset(tmp_path):
+    """A few lots in CSV_data/ so `stats` does the same work on every machine."""
+    data = tmp_path / "CSV_data"
+    data.mkdir()
+    (data / "car_links.csv").write_text(
+        "Car Links\n" + "".join(LOT.format(f"{n:04d}-100") + "\n" for n in range(1, 4)), encoding="utf-8"
+    )
+    (data / "scraped_links.csv").write_text(
+        "Referred_URL,Sold_URL\n" + LOT.format("0010-100") + "," + LOT.format("0011-100") + "\n", encoding="utf-8"
+    )
+    (data / "retry_queue.json").write_text(json.dumps({
+        "0001-100": {"failures": 1, "next_attempt": "2999-01-01 00:00:00", "history": []},
+    }), encoding="utf-8")
+    return tmp_path
+
+
+@pytest.mark.parametrize("args", [
+    ["-c", "import main"],
+    [MAIN_PY, "--help"],
+    [MAIN_PY, "stats"],
+], ids=["import main", "--help", "stats"])
+def test_light_command_imports(args, small_dataset):
+    _, top_level, modules = run_case(args, cwd=small_dataset)
+
+    heavy = sorted({name.split(".")[0] for name in modules} & set(HEAVY_MODULES))
+    assert heavy == []
+    assert total_import_ms(top_level) < IMPORT_BUDGET_MS
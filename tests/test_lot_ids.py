@@ -0,0 +1,76 @@
+"""LotIdSet / LotLinks keying, merging and invalid input."""
+
+import pytest
+
+from functions.lot_ids import _MERGE_THRESHOLD, LotIdSet, LotLinks, lot_url, pack_lot_id, unpack_lot_id
+
+URL = "https://www.grays.com/lot/0001-21060987/motor-vehicles-motor-cycles/2013-dodge-journey"
+OTHER_SLUG = "https://www.grays.com/lot/0001-21060987/motor-vehiclesmotor-cycles/2013-dodge-journey"
+
+
+@pytest.mark.parametrize("bad", ["", "garbage", "0001", "abc-def", "/search/page=2", None, 1.5])
+def test_invalid_input_is_not_a_lot(bad):
+    ids = LotIdSet([bad])
+    assert len(ids) == 0
+    assert ids.add(bad) is False
+    assert bad not in ids
+    ids.discard(bad)
+
+    links = LotLinks([bad])
+    assert len(links) == 0
+    assert bad not in links
+    links.discard(bad)
+
+
+def test_pack_lot_id_rejects_malformed_ids():
+    assert unpack_lot_id(pack_lot_id("0001-21060987")) == "0001-21060987"
+    with pytest.raises(ValueError):
+        pack_lot_id("21060987")
+
+
+def test_url_id_string_and_packed_int_are_the_same_lot():
+    ids = LotIdSet([URL])
+    assert "0001-21060987" in ids
+    assert pack_lot_id("0001-21060987") in ids
+    assert OTHER_SLUG in ids
+    assert ids.add("0001-21060987") is False
+    assert list(ids) == ["0001-21060987"]
+
+
+def test_pending_adds_merge_at_threshold():
+    ids = LotIdSet()
+    lots = [f"{n % 10000:04d}-{100 + n // 10000}" for n in range(1, _MERGE_THRESHOLD + 1)]
+    for lot in lots[:-1]:
+        assert ids.add(lot)
+    assert len(ids._pending) == _MERGE_THRESHOLD - 1
+
+    assert ids.add(lots[-1])
+    assert len(ids._pending) == 0
+    assert len(ids._packed) == len(ids) == _MERGE_THRESHOLD
+    assert all(lot in ids for lot in lots)
+    assert ids.add(lots[0]) is False
+
+
+def test_discard_after_merge():
+    lots = [f"{n:04d}-100" for n in range(1, _MERGE_THRESHOLD + 1)]
+    ids = LotIdSet()
+    for lot in lots:
+        ids.add(lot)
+    assert not ids._pending
+
+    ids.discard(lots[10])
+    ids.discard(lot_url(lots[20], "motor-vehicles-motor-cycles/x"))
+    assert lots[10] not in ids and lots[20] not in ids
+    assert len(ids) == _MERGE_THRESHOLD - 2
+    assert ids.add(lots[10]) is True
+
+
+def test_lot_links_collapses_slug_variants():
+    links = LotLinks([URL, OTHER_SLUG])
+    assert len(links) == 1
+    assert links.add(OTHER_SLUG) is False
+    assert links.urls() == [URL]  # first slug seen wins
+    assert "0001-21060987" in links
+
+    links.discard(OTHER_SLUG)
+    assert len(links) == 0
@@ -0,0 +1,111 @@
+"""RetryQueue backoff, dead-lettering and revive, with an injected clock."""
+
+import json
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from functions.retry_queue import MAX_DELAY_HOURS, MAX_FAILURES, TIME_FORMAT, RetryQueue, retry_delay
+
+NOW = datetime(2024, 1, 1, 12, 0, 0)
+URL = "https://www.grays.com/lot/0001-21060987/motor-vehicles-motor-cycles/2013-dodge-journey"
+OTHER_SLUG = "https://www.grays.com/lot/0001-21060987/motor-vehiclesmotor-cycles/2013-dodge-journey"
+
+
+class CountingPage:
+    """Stands in for a BeautifulSoup; counts how often it is serialised."""
+
+    def __init__(self, html):
+        self.html = html
+        self.serialised = 0
+
+    def __str__(self):
+        self.serialised += 1
+        return self.html
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return RetryQueue(
+        path=str(tmp_path / "retry_queue.json"),
+        dead_letter_path=str(tmp_path / "dead_letter.json"),
+        html_dir=str(tmp_path / "dead_letter_html"),
+    )
+
+
+def next_attempt(queue):
+    return datetime.strptime(queue.entries["0001-21060987"]["next_attempt"], TIME_FORMAT)
+
+
+def test_backoff_doubles_and_is_capped():
+    assert [retry_delay(n) for n in range(1, 7)] == [
+        timedelta(hours=h) for h in (6, 12, 24, 48, 96, MAX_DELAY_HOURS)
+    ]
+
+
+def test_failure_defers_the_lot_until_its_next_attempt(queue):
+    for failures, hours in ((1, 6), (2, 12), (3, 24)):
+        assert queue.record_failure(URL, "unknown", now=NOW) is False
+        assert queue.attempt(URL) == failures + 1
+        assert next_attempt(queue) == NOW + timedelta(hours=hours)
+
+    assert not queue.is_due(URL, now=NOW + timedelta(hours=23))
+    assert queue.is_due(URL, now=NOW + timedelta(hours=24))
+
+
+def test_lot_is_dead_lettered_at_max_failures(queue, tmp_path):
+    page = CountingPage("<html>mystery</html>")
+    for _ in range(MAX_FAILURES - 1):
+        assert queue.record_failure(URL, "unknown", page, now=NOW) is False
+    assert page.serialised == 0  # only written out once the lot is given up on
+
+    assert queue.record_failure(URL, "error", page, now=NOW) is True
+    assert page.serialised == 1
+    assert len(queue) == 0
+    assert queue.is_dead(URL)
+    assert not queue.is_due(URL, now=NOW + timedelta(days=365))
+
+    dead = queue.dead_letters["0001-21060987"]
+    assert dead["failures"] == MAX_FAILURES
+    assert [h["status"] for h in dead["history"]] == ["unknown"] * (MAX_FAILURES - 1) + ["error"]
+    with open(dead["html"], encoding="utf-8") as f:
+        assert f.read() == "<html>mystery</html>"
+    assert os.path.dirname(dead["html"]) == str(tmp_path / "dead_letter_html")
+
+    queue.save()
+    with open(tmp_path / "dead_letter.json") as f:
+        assert list(json.load(f)) == ["0001-21060987"]
+
+
+def test_dead_letter_without_html(queue):
+    for _ in range(MAX_FAILURES):
+        queue.record_failure(URL, "error", now=NOW)
+    assert queue.dead_letters["0001-21060987"]["html"] is None
+
+
+def test_slug_variants_share_one_history(queue):
+    queue.record_failure(URL, "unknown", now=NOW)
+    queue.record_failure(OTHER_SLUG, "unknown", now=NOW)
+    assert list(queue.entries) == ["0001-21060987"]
+    assert queue.attempt(URL) == queue.attempt(OTHER_SLUG) == 3
+
+    queue.record_success(OTHER_SLUG)
+    assert len(queue) == 0
+
+
+def test_revive_clears_the_dead_letter_and_history(queue, tmp_path):
+    for _ in range(MAX_FAILURES):
+        queue.record_failure(URL, "unknown", now=NOW)
+    queue.revive(OTHER_SLUG)
+
+    assert not queue.is_dead(URL)
+    assert queue.is_due(URL, now=NOW)
+    assert queue.attempt(URL) == 1
+
+    queue.save()
+    reloaded = RetryQueue(
+        path=str(tmp_path / "retry_queue.json"),
+        dead_letter_path=str(tmp_path / "dead_letter.json"),
+    )
+    assert reloaded.dead_letters == {} and reloaded.entries == {}